@@ -0,0 +1,286 @@
+# Host-side (CPython) stand-in for the micro:bit "microbit" module
+#
+# Lets iBIT.py and mission code run on a PC, much faster than real time:
+#   PYTHONPATH=host:. python3 my_mission.py
+#
+# - Time is virtual: sleep() advances the clock instantly, and every I2C
+#   transaction costs I2C_US microseconds so busy loops still make progress.
+# - i2c answers ADS7828 transactions at ADC_ADDRESS. Channel values come from
+#   set_adc() or from a recorded log replayed with replay().
+# - Log files are the binary telemetry frames written by iBIT.SendTelemetry()
+#   (capture the serial port to a file); frames are replayed by timestamp.
+# - Pins remember the last digital/analog value and count their writes.
+
+import struct
+
+I2C_US = 100  # virtual cost of one I2C transaction
+
+_TICKS_PERIOD = 1 << 30  # ticks_ms() wraps here, on the device and in utime.py
+
+_clock_us = 0
+
+
+def _advance_us(us):
+    global _clock_us
+    _clock_us += int(us)
+
+
+def sleep(ms):
+    _advance_us(ms * 1000)
+
+
+def running_time():
+    return _clock_us // 1000
+
+
+# ---------------------------
+# Pins
+# ---------------------------
+class MicroBitPin:
+    def __init__(self, name):
+        self.name = name
+        self.value = 0         # last write_digital()
+        self.duty = 0          # last write_analog()
+        self.period_us = 20000
+        self.writes = 0        # write_digital() + write_analog() calls
+        self.analog_in = 0     # returned by read_analog()
+
+    def write_digital(self, value):
+        self.value = 1 if value else 0
+        self.duty = 1023 if value else 0
+        self.writes += 1
+
+    def write_analog(self, value):
+        self.duty = int(value)
+        self.writes += 1
+
+    def read_digital(self):
+        return self.value
+
+    def read_analog(self):
+        return self.analog_in
+
+    def set_analog_period(self, period_ms):
+        self.period_us = int(period_ms) * 1000
+
+    def set_analog_period_microseconds(self, period_us):
+        self.period_us = int(period_us)
+
+
+pin0 = MicroBitPin(0)
+pin1 = MicroBitPin(1)
+pin2 = MicroBitPin(2)
+pin8 = MicroBitPin(8)
+pin12 = MicroBitPin(12)
+pin13 = MicroBitPin(13)
+pin14 = MicroBitPin(14)
+pin15 = MicroBitPin(15)
+pin16 = MicroBitPin(16)
+
+
+# ---------------------------
+# Telemetry log decoding
+# ---------------------------
+def read_frames(data):
+    """
+    Decode iBIT telemetry frames from bytes. Yields (ticks_ms, mask, values)
+    with values as a list of 8 (None for channels not in mask). Garbage and
+    frames with a bad checksum are skipped.
+    """
+    i = 0
+    end = len(data)
+    while True:
+        i = data.find(b'\xa5\x5a', i)
+        if i < 0 or i + 8 > end:
+            return
+        mask = data[i + 2]
+        n = bin(mask).count('1')
+        size = 8 + (3 * n + 1) // 2 + 1
+        if i + size > end:
+            return
+        if sum(data[i + 2:i + size - 1]) & 0xFF != data[i + size - 1]:
+            i += 1
+            continue
+        t = struct.unpack_from('<I', data, i + 4)[0]
+        raw = []
+        j = i + 8
+        while len(raw) < n:
+            raw.append((data[j] << 4) | (data[j + 1] >> 4))
+            if len(raw) < n:
+                raw.append(((data[j + 1] & 15) << 8) | data[j + 2])
+            j += 3
+        values = [None] * 8
+        k = 0
+        for ch in range(8):
+            if mask & (1 << ch):
+                values[ch] = raw[k]
+                k += 1
+        yield t, mask, values
+        i += size
+
+
+# ---------------------------
+# I2C with an emulated ADS7828
+# ---------------------------
+_SINGLE = (0, 2, 4, 6, 1, 3, 5, 7)  # C2..C0 -> single-ended channel
+_DIFF = ((0, 1), (2, 3), (4, 5), (6, 7), (1, 0), (3, 2), (5, 4), (7, 6))
+
+
+class MicroBitI2C:
+    def __init__(self):
+        self.ADC_ADDRESS = 0x4A  # IBIT_V2; set to 0x48 to emulate IBIT_V1
+        self.values = [0] * 8
+        self.command = None
+        self.writes = 0
+        self.reads = 0
+        self._frames = []
+        self._next = 0
+        self._t0 = 0
+        self._loop = False
+
+    def init(self, freq=100000, sda=None, scl=None):
+        pass
+
+    def scan(self):
+        return [self.ADC_ADDRESS]
+
+    def set_adc(self, ch, value):
+        """Set a fixed reading for single-ended channel ch."""
+        self.values[ch] = int(value)
+
+    def replay(self, path, loop=False):
+        """
+        Replay a recorded telemetry log: the first frame is aligned with the
+        current virtual time, later frames apply once their timestamp is due.
+        """
+        with open(path, 'rb') as f:
+            frames = list(read_frames(f.read()))
+        # Timestamps are ticks_ms() values that wrap at 2**30: accumulate
+        # the wrapped step between frames into an offset from the first one
+        self._frames = []
+        offset = 0
+        prev = frames[0][0] if frames else 0
+        for t, _, v in frames:
+            offset += (t - prev) % _TICKS_PERIOD
+            prev = t
+            self._frames.append((offset, v))
+        self._next = 0
+        self._t0 = running_time()
+        self._loop = loop
+
+    def _update(self):
+        frames = self._frames
+        if not frames:
+            return
+        now = running_time() - self._t0
+        while True:
+            if self._next >= len(frames):
+                if not self._loop:
+                    return
+                span = frames[-1][0] + 1
+                self._t0 += span
+                now -= span
+                self._next = 0
+            t, values = frames[self._next]
+            if t > now:
+                return
+            for ch in range(8):
+                if values[ch] is not None:
+                    self.values[ch] = values[ch]
+            self._next += 1
+
+    def _check(self, addr):
+        _advance_us(I2C_US)
+        if addr != self.ADC_ADDRESS:
+            raise OSError(19)
+
+    def write(self, addr, buf, repeat=False):
+        self._check(addr)
+        self.writes += 1
+        self.command = buf[0]
+
+    def read(self, addr, n, repeat=False):
+        self._check(addr)
+        self.reads += 1
+        self._update()
+        cmd = self.command or 0
+        sel = (cmd >> 4) & 7
+        if cmd & 0x80:
+            v = self.values[_SINGLE[sel]]
+        else:
+            p, m = _DIFF[sel]
+            v = self.values[p] - self.values[m]
+        v = min(max(v, 0), 4095)
+        return bytes((v >> 8, v & 0xFF) + (0,) * (n - 2))
+
+
+i2c = MicroBitI2C()
+
+
+# ---------------------------
+# Serial, buttons, display
+# ---------------------------
+class MicroBitUART:
+    def __init__(self):
+        self.output = bytearray()  # everything written with uart.write()
+
+    def init(self, baudrate=9600, bits=8, parity=None, stop=1, tx=None, rx=None):
+        pass
+
+    def write(self, buf):
+        self.output += buf
+        return len(buf)
+
+    def any(self):
+        return False
+
+    def read(self, n=None):
+        return None
+
+
+uart = MicroBitUART()
+
+
+class MicroBitButton:
+    def __init__(self):
+        self.pressed = False
+        self._presses = 0
+
+    def press(self):
+        self._presses += 1
+
+    def is_pressed(self):
+        return self.pressed
+
+    def was_pressed(self):
+        p = self._presses > 0
+        self._presses = 0
+        return p
+
+    def get_presses(self):
+        p = self._presses
+        self._presses = 0
+        return p
+
+
+button_a = MicroBitButton()
+button_b = MicroBitButton()
+
+
+class Image:
+    def __init__(self, *args):
+        self.args = args
+
+
+class _Display:
+    def show(self, *args, **kwargs):
+        pass
+
+    def scroll(self, *args, **kwargs):
+        pass
+
+    def clear(self):
+        pass
+
+
+display = _Display()
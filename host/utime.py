@@ -0,0 +1,35 @@
+# Host-side (CPython) stand-in for MicroPython's utime, driven by the virtual
+# clock of host/microbit.py so ticks and sleep() stay consistent.
+
+import microbit
+
+_TICKS_PERIOD = 1 << 30
+_TICKS_HALF = _TICKS_PERIOD // 2
+
+
+def ticks_ms():
+    return (microbit._clock_us // 1000) % _TICKS_PERIOD
+
+
+def ticks_us():
+    return microbit._clock_us % _TICKS_PERIOD
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) % _TICKS_PERIOD
+
+
+def ticks_diff(ticks1, ticks2):
+    return ((ticks1 - ticks2 + _TICKS_HALF) % _TICKS_PERIOD) - _TICKS_HALF
+
+
+def sleep_ms(ms):
+    microbit.sleep(ms)
+
+
+def sleep_us(us):
+    microbit._advance_us(us)
+
+
+def sleep(seconds):
+    microbit.sleep(seconds * 1000)
@@ -1,13 +1,21 @@
 # iBIT MicroPython port (instance-based I2C address selection)
 # - ibit = iBIT()        -> default address = IBIT_V2 (0x4A)
 # - ibit = iBIT(0x48)    -> address = IBIT_V1 (0x48)
+# - ibit = iBIT(IBIT_AUTO) -> detect IBIT_V1 / IBIT_V2 once at construction
 #
 # ReadADC() supports:
 #   - ReadADC(0..7)         (channel number style)
 #   - ReadADC(ADC0..ADC7)   (command byte style)
 #   - Otherwise returns -1
 
-from microbit import pin8, pin12, pin13, pin14, pin15, pin16, i2c, sleep
+from microbit import pin8, pin12, pin13, pin14, pin15, pin16, i2c, sleep, uart
+from array import array
+from utime import ticks_ms, ticks_us, ticks_add, ticks_diff
+
+try:
+    from microbit import run_every as _run_every  # micro:bit V2 only
+except ImportError:
+    _run_every = None
 
 # ---------------------------
 # Public constants (like enums)
@@ -29,6 +37,15 @@ M2 = 1
 M12 = 2
 M_ALL = 3
 
+# Motion queue primitives (see addMotion)
+MOVE_FD = 0
+MOVE_BK = 1
+MOVE_SL = 2
+MOVE_SR = 3
+MOVE_TL = 4
+MOVE_TR = 5
+MOVE_STOP = 6
+
 # ADC command bytes (matching your MakeCode enum values)
 ADC0 = 132
 ADC1 = 196
@@ -39,9 +56,62 @@ ADC5 = 228
 ADC6 = 180
 ADC7 = 244
 
+# ADC oversampling modes (see setADCOversample)
+ADC_OS_AVG = 0       # mean of N conversions, 12-bit result
+ADC_OS_DECIMATE = 1  # N = 4 or 16 summed and decimated to 13 or 14 bits
+ADC_OS_MEDIAN = 2    # median of N conversions (spike rejection)
+
+# Differential channel pairs (IN+ minus IN-), usable wherever a channel
+# number is accepted by ReadADCDiff, the batched scans and the sampler
+ADC_DIFF01 = 8
+ADC_DIFF23 = 9
+ADC_DIFF45 = 10
+ADC_DIFF67 = 11
+ADC_DIFF10 = 12
+ADC_DIFF32 = 13
+ADC_DIFF54 = 14
+ADC_DIFF76 = 15
+
+# ADS7828 power-down / reference modes (PD1 PD0 bits, see setADCMode)
+ADC_PD_ALL_OFF = 0  # power down between conversions (lowest power)
+ADC_PD_REF_OFF = 1  # internal reference off, converter on (default, = ADC0..ADC7)
+ADC_PD_ADC_OFF = 2  # internal 2.5 V reference on, converter off between conversions
+ADC_PD_ALL_ON = 3   # internal 2.5 V reference and converter always on (lowest latency)
+
+# Full-scale input voltage in mV for the default (external) reference and
+# for the ADS7828 internal reference modes
+ADC_VREF_MV = 3300
+ADC_VREF_INTERNAL_MV = 2500
+
+# Single-ended command bytes indexed by channel number, and the one-byte I2C
+# write buffers for every power-down mode (built once so reads only index a
+# table). Entries 0..7 are single-ended, 8..15 the differential pairs
+# (SD = 0, C2..C0 = pair).
+_ADC_CMD = (ADC0, ADC1, ADC2, ADC3, ADC4, ADC5, ADC6, ADC7)
+_ADC_BUFS = tuple(tuple(bytes(((c & 0xF3) | (pd << 2),)) for c in _ADC_CMD) +
+                  tuple(bytes(((p << 4) | (pd << 2),)) for p in range(8))
+                  for pd in range(4))
+_ADC_ALL = bytes(range(8))
+
+# Binary telemetry frame (see StartTelemetry)
+TELEMETRY_SYNC = b'\xa5\x5a'
+
 # I2C addresses
 IBIT_V1 = 0x48
 IBIT_V2 = 0x4A
+IBIT_AUTO = -1  # probe the bus once for IBIT_V2 / IBIT_V1 (see detectBoard)
+
+
+class iBITState:
+    """
+    Snapshot of the actuators, filled in by iBIT.state():
+      m1_dir / m2_dir:   FORWARD or BACKWARD (-1 before the first command)
+      m1_duty / m2_duty: PWM duty 0..1023
+      sv1_deg / sv2_deg: last servo angle 0..180
+      sv1_on / sv2_on:   True while the servo is driven (False after ServoStop)
+    """
+    __slots__ = ('m1_dir', 'm1_duty', 'm2_dir', 'm2_duty',
+                 'sv1_deg', 'sv1_on', 'sv2_deg', 'sv2_on')
 
 
 class iBIT:
@@ -50,10 +120,68 @@ class iBIT:
         Create an iBIT object with a selectable ADC I2C address.
 
         Examples:
-            ibit = iBIT()       # default 0x4A (IBIT_V2)
-            ibit = iBIT(0x48)   # 0x48 (IBIT_V1)
+            ibit = iBIT()           # default 0x4A (IBIT_V2)
+            ibit = iBIT(0x48)       # 0x48 (IBIT_V1)
+            ibit = iBIT(IBIT_AUTO)  # detect V1/V2 now; raises OSError if absent
         """
-        self.ADC_ADDRESS = int(adc_address)
+        self.board = None  # IBIT_V1 / IBIT_V2 when known
+
+        # Last level / duty written to P13, P14, P15, P16 (-1 = unknown)
+        self._pin = array('h', [-1] * 4)
+        self.setMotorProfile()  # speed -> duty lookup tables
+        self._rp_rate = 0  # motor ramp in duty/s, 0 = off (setMotorRamp)
+        self._rp_cur = array('h', [0, 0])  # signed duty now / target
+        self._rp_tgt = array('h', [0, 0])
+        self._sv = array('h', [0] * 4)  # SV1 angle, SV1 on, SV2 angle, SV2 on
+        self._state = iBITState()
+        self._mv_due = None  # ticks_ms() deadline of a non-blocking timed move
+        self._mq = None      # motion queue ring, allocated by setMotionQueue
+        self._mq_count = 0
+        self.setADC_Address(IBIT_V2 if adc_address == IBIT_AUTO else adc_address)
+        self._adc_all = array('H', [0] * 8)  # default result buffer for ReadADCAll()
+        self._adc_buf = _ADC_BUFS[ADC_PD_REF_OFF]  # command buffers for the current mode
+        self._adc_lock = False  # True while an ADS7828 transaction is in flight
+        self._adc_os_n = bytearray(b'\x01' * 16)  # conversions per read, per channel
+        self._adc_os_mode = bytearray(16)
+        self._adc_os_shift = bytearray(16)  # extra bits of decimated channels
+        self._adc_os_buf = None  # median scratch, allocated on first use
+        self._adc_vref = ADC_VREF_MV
+        self._adc_good = array('H', [0] * 16)  # last good value per table entry
+        self._adc_have = 0                     # bit idx set once _adc_good[idx] is valid
+        self.setADCRetry()
+        self.resetADCCounters()
+        self._st_mask = 0  # channels with running statistics (setADCStats)
+        self._lut = None   # per-channel (raw, value) arrays, see setADCTable
+        self._adc_off = array('h', [0] * 16)      # calibration offset (counts)
+        self._adc_gain = array('l', [65536] * 16)  # calibration gain (Q16)
+        self._adc_k = array('l', [0] * 16)        # counts -> mV factor (Q16)
+        self.__adc_update_k()
+        self._adc_sel = -1     # command table entry last written to the ADC
+        self._adc_stream = -1  # channel in fast repeat mode (setADCStream)
+
+        # Threshold table (compiled by setADCThreshold)
+        self._thr_ch = b''
+        self._thr_state = 0  # bit ch set while channel ch is above its level
+        self._thr_new = 0    # bit ch set until the first poll() reading
+
+        # Line sensor array (allocated by setLineSensors)
+        self.setLineSensors(())
+
+        # Telemetry frame (allocated by StartTelemetry)
+        self._tlm_frame = None
+
+        # Background sampler (allocated by StartSampler)
+        self._smp_on = False
+        self._smp_timer = False
+        self._smp_busy = False
+        self._smp_head = 0
+        self._smp_tail = 0
+        self.sampler_overruns = 0
+        self.sampler_missed = 0
+
+        self._board_probed = False
+        if adc_address == IBIT_AUTO:
+            self.detectBoard()
 
     # ---------------------------
     # "Private" / Internal methods (name mangling)
@@ -65,10 +193,71 @@ class iBIT:
             return hi
         return x
 
-    def __map_0_100_to_0_1023(self, speed_percent):
-        """Map 0..100% to 0..1023 PWM duty."""
-        s = self.__clamp(int(speed_percent), 0, 100)
-        return (s * 1023) // 100
+    def __m1(self, level, duty):
+        """Command motor 1; with a ramp set, only its target is updated."""
+        if self._rp_rate:
+            self._rp_tgt[0] = duty if level else -duty
+        else:
+            self.__pin_m1(level, duty)
+
+    def __m2(self, level, duty):
+        """Command motor 2; with a ramp set, only its target is updated."""
+        if self._rp_rate:
+            self._rp_tgt[1] = -duty if level else duty
+        else:
+            self.__pin_m2(level, duty)
+
+    def __pin_m1(self, level, duty):
+        """Drive motor 1 (P13 direction, P14 PWM), skipping unchanged pins."""
+        sh = self._pin
+        if sh[0] != level:
+            pin13.write_digital(level)
+            sh[0] = level
+        if sh[1] != duty:
+            pin14.write_analog(duty)
+            sh[1] = duty
+
+    def __pin_m2(self, level, duty):
+        """Drive motor 2 (P15 direction, P16 PWM), skipping unchanged pins."""
+        sh = self._pin
+        if sh[2] != level:
+            pin15.write_digital(level)
+            sh[2] = level
+        if sh[3] != duty:
+            pin16.write_analog(duty)
+            sh[3] = duty
+
+    def __ramp_tick(self):
+        """
+        Move both motors' signed duty (+ = FORWARD) toward their targets by
+        at most rate * elapsed time. Returns True while still ramping.
+        """
+        now = ticks_ms()
+        cur = self._rp_cur
+        tgt = self._rp_tgt
+        if cur[0] == tgt[0] and cur[1] == tgt[1]:
+            self._rp_t = now
+            return False
+        dt = ticks_diff(now, self._rp_t)
+        if dt > 100:  # a stalled caller must not turn into a step change
+            dt = 100
+        step = self._rp_rate * dt // 1000
+        if step <= 0:
+            return True
+        self._rp_t = now
+        for m in range(2):
+            c = cur[m]
+            t = tgt[m]
+            if c < t:
+                c = c + step if t - c > step else t
+            elif c > t:
+                c = c - step if c - t > step else t
+            cur[m] = c
+        c = cur[0]
+        self.__pin_m1(1 if c >= 0 else 0, c if c >= 0 else -c)
+        c = cur[1]
+        self.__pin_m2(0 if c >= 0 else 1, c if c >= 0 else -c)
+        return cur[0] != tgt[0] or cur[1] != tgt[1]
 
     def __servo_write_deg(self, p, deg, us_min=500, us_max=2500):
         """
@@ -87,6 +276,7 @@ class iBIT:
         duty = self.__clamp(duty, 0, 1023)
 
         p.write_analog(duty)
+        return deg
 
     def __servo_stop(self, p):
         """Best-effort detach/stop PWM for servo on micro:bit."""
@@ -96,98 +286,233 @@ class iBIT:
     # ---------------------------
     # Public API (motor control)
     # ---------------------------
+    # Every motor command takes over from a pending non-blocking timed move
+    # (fd(..., wait=False) etc.), so tick() will not stop it later.
     def Motor(self, direction, speed):
-        motorspeed = self.__map_0_100_to_0_1023(speed)
+        self._mv_due = None
+        s = int(speed)
+        if s > 100:
+            s = 100
+        elif s < 0:
+            s = 0
 
         if direction == FORWARD:
-            pin13.write_digital(1)
-            pin14.write_analog(motorspeed)
-            pin15.write_digital(0)
-            pin16.write_analog(motorspeed)
+            self.__m1(1, self._duty1[s])
+            self.__m2(0, self._duty2[s])
 
         elif direction == BACKWARD:
-            pin13.write_digital(0)
-            pin14.write_analog(motorspeed)
-            pin15.write_digital(1)
-            pin16.write_analog(motorspeed)
+            self.__m1(0, self._duty1[s])
+            self.__m2(1, self._duty2[s])
 
     def Motor2(self, direction, speed1, speed2):
-        ms1 = self.__map_0_100_to_0_1023(speed1)
-        ms2 = self.__map_0_100_to_0_1023(speed2)
+        self._mv_due = None
+        s1 = int(speed1)
+        if s1 > 100:
+            s1 = 100
+        elif s1 < 0:
+            s1 = 0
+        s2 = int(speed2)
+        if s2 > 100:
+            s2 = 100
+        elif s2 < 0:
+            s2 = 0
 
         if direction == FORWARD:
-            pin13.write_digital(1)
-            pin14.write_analog(ms1)
-            pin15.write_digital(0)
-            pin16.write_analog(ms2)
+            self.__m1(1, self._duty1[s1])
+            self.__m2(0, self._duty2[s2])
 
         elif direction == BACKWARD:
-            pin13.write_digital(0)
-            pin14.write_analog(ms1)
-            pin15.write_digital(1)
-            pin16.write_analog(ms2)
+            self.__m1(0, self._duty1[s1])
+            self.__m2(1, self._duty2[s2])
 
     def Turn(self, turn_dir, speed):
-        motorspeed = self.__map_0_100_to_0_1023(speed)
+        self._mv_due = None
+        s = int(speed)
+        if s > 100:
+            s = 100
+        elif s < 0:
+            s = 0
 
         if turn_dir == TURN_LEFT:
-            pin13.write_digital(1)
-            pin14.write_analog(0)
-            pin15.write_digital(0)
-            pin16.write_analog(motorspeed)
+            self.__m1(1, 0)
+            self.__m2(0, self._duty2[s])
 
         elif turn_dir == TURN_RIGHT:
-            pin13.write_digital(1)
-            pin14.write_analog(motorspeed)
-            pin15.write_digital(0)
-            pin16.write_analog(0)
+            self.__m1(1, self._duty1[s])
+            self.__m2(0, 0)
 
     def Spin(self, spin_dir, speed):
-        motorspeed = self.__map_0_100_to_0_1023(speed)
+        self._mv_due = None
+        s = int(speed)
+        if s > 100:
+            s = 100
+        elif s < 0:
+            s = 0
 
         if spin_dir == SPIN_LEFT:
-            pin13.write_digital(0)
-            pin14.write_analog(motorspeed)
-            pin15.write_digital(0)
-            pin16.write_analog(motorspeed)
+            self.__m1(0, self._duty1[s])
+            self.__m2(0, self._duty2[s])
 
         elif spin_dir == SPIN_RIGHT:
-            pin13.write_digital(1)
-            pin14.write_analog(motorspeed)
-            pin15.write_digital(1)
-            pin16.write_analog(motorspeed)
+            self.__m1(1, self._duty1[s])
+            self.__m2(1, self._duty2[s])
 
     def MotorStop(self, ch):
-        if ch == M1 or ch == 1:
-            pin13.write_digital(1)
-            pin14.write_analog(0)
-        if ch == M2 or ch == 2:
-            pin15.write_digital(1)
-            pin16.write_analog(0)
-        if ch == M_ALL or ch == M12 or ch == 12:
-            pin13.write_digital(1)
-            pin14.write_analog(0)
-            pin15.write_digital(1)
-            pin16.write_analog(0)
+        """Stop motor(s) at once, bypassing the ramp (setMotorRamp)."""
+        self._mv_due = None
+        if ch == M1 or ch == 1 or ch == M_ALL or ch == M12 or ch == 12:
+            self._rp_cur[0] = 0
+            self._rp_tgt[0] = 0
+            self.__pin_m1(1, 0)
+        if ch == M2 or ch == 2 or ch == M_ALL or ch == M12 or ch == 12:
+            self._rp_cur[1] = 0
+            self._rp_tgt[1] = 0
+            self.__pin_m2(1, 0)
 
     def setMotor(self, channel, direction, speed):
-        motorspeed = self.__map_0_100_to_0_1023(speed)
+        self._mv_due = None
+        s = int(speed)
+        if s > 100:
+            s = 100
+        elif s < 0:
+            s = 0
 
         if (channel == M1 or channel == 1) and direction == FORWARD:
-            pin13.write_digital(1)
-            pin14.write_analog(motorspeed)
+            self.__m1(1, self._duty1[s])
 
         elif (channel == M2 or channel == 2) and direction == FORWARD:
-            pin15.write_digital(0)
-            pin16.write_analog(motorspeed)
+            self.__m2(0, self._duty2[s])
 
         elif (channel == M1 or channel == 1) and direction == BACKWARD:
-            pin13.write_digital(0)
-            pin14.write_analog(motorspeed)
+            self.__m1(0, self._duty1[s])
 
         elif (channel == M2 or channel == 2) and direction == BACKWARD:
-            pin15.write_digital(1)
-            pin16.write_analog(motorspeed)
+            self.__m2(1, self._duty2[s])
+
+    def drive(self, left, right, raw=False):
+        """
+        Set both wheels in one call from signed speeds: -100..100 % (through
+        the duty tables, so profile and trim apply), or with raw=True PWM
+        duty -1023..1023. Positive is FORWARD; left is motor 1, right is
+        motor 2.
+        """
+        self._mv_due = None
+        l = int(left)
+        r = int(right)
+        if raw:
+            top = 1023
+        else:
+            top = 100
+        if l > top:
+            l = top
+        elif l < -top:
+            l = -top
+        if r > top:
+            r = top
+        elif r < -top:
+            r = -top
+        if not raw:
+            l = self._duty1[l] if l >= 0 else -self._duty1[-l]
+            r = self._duty2[r] if r >= 0 else -self._duty2[-r]
+
+        if l >= 0:
+            self.__m1(1, l)
+        else:
+            self.__m1(0, -l)
+        if r >= 0:
+            self.__m2(0, r)
+        else:
+            self.__m2(1, -r)
+
+    def arcade(self, throttle, turn):
+        """
+        Arcade mix: throttle and turn in -100..100 (turn > 0 = right).
+        Wheel speeds are throttle +/- turn, scaled down together if either
+        exceeds 100 so the ratio between them is kept.
+        """
+        t = self.__clamp(int(throttle), -100, 100)
+        z = self.__clamp(int(turn), -100, 100)
+        self.__mix(t + z, t - z)
+
+    def curvature(self, throttle, curvature):
+        """
+        Curvature mix: like arcade(), but the turn scales with |throttle| so
+        curvature (-100..100, > 0 = right) sets the path radius, not the
+        turn rate. With throttle 0 the robot stops; use arcade() to spin.
+        """
+        t = self.__clamp(int(throttle), -100, 100)
+        c = self.__clamp(int(curvature), -100, 100)
+        # scale magnitudes so left and right turns mirror (// floors negatives)
+        z = (t if t >= 0 else -t) * (c if c >= 0 else -c) // 100
+        if c < 0:
+            z = -z
+        self.__mix(t + z, t - z)
+
+    def __mix(self, l, r):
+        m = l if l >= 0 else -l
+        n = r if r >= 0 else -r
+        if n > m:
+            m = n
+        if m > 100:
+            l = l * 100 // m if l >= 0 else -(-l * 100 // m)
+            r = r * 100 // m if r >= 0 else -(-r * 100 // m)
+        self.drive(l, r)
+
+    def setMotorProfile(self, limit=100, deadband=0, trim1=100, trim2=100):
+        """
+        Rebuild the speed (0..100) -> PWM duty tables used by every motor call.
+          - limit: global top speed in % (speed 100 maps here)
+          - deadband: minimum % for any non-zero speed (motor stall point)
+          - trim1 / trim2: per-motor scale in % to match the two wheels
+        Defaults reproduce the plain 0..100 -> 0..1023 mapping.
+        """
+        limit = self.__clamp(int(limit), 0, 100)
+        deadband = self.__clamp(int(deadband), 0, limit)
+        self._duty1 = self.__duty_table(limit, deadband, self.__clamp(int(trim1), 0, 100))
+        self._duty2 = self.__duty_table(limit, deadband, self.__clamp(int(trim2), 0, 100))
+
+    def setMotorRamp(self, rate=0):
+        """
+        Limit motor acceleration to rate % per second (e.g. 200: 0 -> 100%
+        in 0.5 s); 0 turns ramping off and applies the targets at once.
+        While ramping is on, motor commands only set targets and tick()
+        moves the motors toward them, so call tick() from the loop.
+        Direction changes pass through zero. MotorStop() (and so ao() and
+        clearMotion()) still stops at once.
+        """
+        rate = int(rate)
+        if rate < 0:
+            raise ValueError("rate must be >= 0")
+        rate = rate * 1023 // 100
+        if self._rp_rate and not rate:
+            self._rp_rate = 0
+            self.__m1(1 if self._rp_tgt[0] >= 0 else 0, abs(self._rp_tgt[0]))
+            self.__m2(0 if self._rp_tgt[1] >= 0 else 1, abs(self._rp_tgt[1]))
+            return
+        if rate and not self._rp_rate:
+            sh = self._pin
+            d1 = sh[1] if sh[1] > 0 else 0
+            d2 = sh[3] if sh[3] > 0 else 0
+            self._rp_cur = array('h', [d1 if sh[0] != 0 else -d1,
+                                       -d2 if sh[2] == 1 else d2])
+            self._rp_tgt = array('h', self._rp_cur)
+            self._rp_t = ticks_ms()
+        self._rp_rate = rate
+
+    def __duty_table(self, limit, deadband, trim):
+        t = array('H', [0] * 101)
+        for s in range(1, 101):
+            pct_x100 = deadband * 100 + (limit - deadband) * s
+            t[s] = pct_x100 * 1023 * trim // 1000000
+        return t
+
+    def resyncMotors(self):
+        """
+        Forget the remembered P13-P16 state so the next motor command writes
+        every pin. Call it after writing those pins outside this class.
+        """
+        for i in range(4):
+            self._pin[i] = -1
 
     # ---------------------------
     # Public API (ADC)
@@ -195,6 +520,194 @@ class iBIT:
     def setADC_Address(self, addr):
         """Set ADC I2C address for this iBIT instance."""
         self.ADC_ADDRESS = int(addr)
+        self._adc_sel = -1
+        self.board = self.ADC_ADDRESS if self.ADC_ADDRESS in (IBIT_V1, IBIT_V2) else None
+
+    def detectBoard(self, rescan=False):
+        """
+        Find the iBIT ADC with one i2c.scan(), select its address and return
+        IBIT_V2 or IBIT_V1. The result is cached in self.board: later calls
+        return it without touching the bus unless rescan is True.
+        Raises OSError if neither address answers.
+        """
+        if self._board_probed and not rescan:
+            return self.board
+        found = i2c.scan()
+        for addr in (IBIT_V2, IBIT_V1):
+            if addr in found:
+                self.setADC_Address(addr)
+                self._board_probed = True
+                return addr
+        raise OSError("iBIT ADC not found at 0x48 or 0x4A")
+
+    def __adc_read(self, idx):
+        """
+        Resilient read of command table entry idx: bounded immediate retries,
+        optional fast-fail window and last-good fallback (see setADCRetry),
+        with error and latency counters.
+        """
+        if self._adc_down_until is not None:
+            if ticks_diff(self._adc_down_until, ticks_ms()) > 0:
+                self.adc_skipped += 1
+                return self.__adc_fail(idx, OSError(5))
+            self._adc_down_until = None
+
+        t0 = ticks_us()
+        tries = self._adc_retries
+        while True:
+            try:
+                v = self.__adc_xfer(idx)
+                break
+            except OSError as e:
+                self.adc_errors += 1
+                self._adc_sel = -1
+                if tries <= 0:
+                    self.adc_failures += 1
+                    if self._adc_backoff:
+                        self._adc_down_until = ticks_add(ticks_ms(), self._adc_backoff)
+                    return self.__adc_fail(idx, e)
+                tries -= 1
+
+        dt = ticks_diff(ticks_us(), t0)
+        self.adc_last_us = dt
+        if dt > self.adc_max_us:
+            self.adc_max_us = dt
+        self._adc_good[idx] = v
+        self._adc_have |= 1 << idx
+        if self._st_mask & (1 << idx):
+            self.__stats_add(idx, v)
+        return v
+
+    def __adc_fail(self, idx, err):
+        if self._adc_hold and self._adc_have & (1 << idx):
+            return self._adc_good[idx]
+        raise err
+
+    def __adc_xfer(self, idx):
+        """
+        One ADS7828 read using cached command buffer idx (0..15).
+        With oversampling enabled for the channel, the command byte is sent
+        once and the following reads each trigger a new conversion. In
+        stream mode the command byte is skipped when it is already selected.
+        """
+        addr = self.ADC_ADDRESS
+        n = self._adc_os_n[idx]
+        self._adc_lock = True
+        try:
+            if idx != self._adc_sel or idx != self._adc_stream:
+                self._adc_sel = -1
+                i2c.write(addr, self._adc_buf[idx], repeat=False)
+                self._adc_sel = idx
+            data = i2c.read(addr, 2, repeat=False)
+            if n == 1:
+                return (data[0] << 8) | data[1]
+            return self.__adc_oversample(addr, idx, n, (data[0] << 8) | data[1])
+        finally:
+            self._adc_lock = False
+
+    def __adc_oversample(self, addr, idx, n, first):
+        mode = self._adc_os_mode[idx]
+        if mode == ADC_OS_MEDIAN:
+            buf = self._adc_os_buf
+            buf[0] = first
+            for i in range(1, n):
+                data = i2c.read(addr, 2, repeat=False)
+                v = (data[0] << 8) | data[1]
+                j = i
+                while j and buf[j - 1] > v:  # insertion sort, n <= 16
+                    buf[j] = buf[j - 1]
+                    j -= 1
+                buf[j] = v
+            return buf[n >> 1]
+
+        total = first
+        for i in range(1, n):
+            data = i2c.read(addr, 2, repeat=False)
+            total += (data[0] << 8) | data[1]
+        if mode == ADC_OS_DECIMATE:
+            return total >> (1 if n == 4 else 2)
+        return (total + (n >> 1)) // n
+
+    def setADCRetry(self, retries=0, hold_last=False, backoff_ms=0):
+        """
+        Configure how ADC reads survive I2C errors (OSError):
+          - retries: extra immediate attempts per read (0 = fail at once)
+          - hold_last: after the last attempt fails, return the channel's
+            last good value instead of raising (raises if there is none)
+          - backoff_ms: after a failed read, skip the bus entirely for this
+            long and fail fast (or hold) without waiting on I2C timeouts
+        Counters: adc_errors (failed transactions), adc_failures (reads that
+        ran out of retries), adc_skipped (reads skipped by the backoff),
+        adc_last_us / adc_max_us (latency of successful reads). They can be
+        reset with resetADCCounters().
+        """
+        self._adc_retries = max(0, int(retries))
+        self._adc_hold = bool(hold_last)
+        self._adc_backoff = max(0, int(backoff_ms))
+        self._adc_down_until = None
+
+    def resetADCCounters(self):
+        """Zero the ADC error and latency counters."""
+        self.adc_errors = 0
+        self.adc_failures = 0
+        self.adc_skipped = 0
+        self.adc_last_us = 0
+        self.adc_max_us = 0
+
+    def setADCOversample(self, ch, n=1, mode=ADC_OS_AVG):
+        """
+        Set oversampling for channel ch (0..7 or ADC_DIFFxx), applied by ReadADC, the
+        batched scans and the sampler.
+          - ADC_OS_AVG:      n = 1..16, rounded mean (0..4095)
+          - ADC_OS_DECIMATE: n = 4 -> 13-bit (0..8190), n = 16 -> 14-bit (0..16380)
+          - ADC_OS_MEDIAN:   n = 1..16, median (0..4095)
+        n = 1 turns oversampling off.
+        """
+        n = int(n)
+        if not 0 <= ch <= 15 or not 1 <= n <= 16:
+            raise ValueError("ch must be 0..15 and n 1..16")
+        if mode == ADC_OS_DECIMATE and n not in (4, 16):
+            raise ValueError("decimation needs n = 4 or 16")
+        if mode == ADC_OS_MEDIAN and self._adc_os_buf is None:
+            self._adc_os_buf = array('H', [0] * 16)
+        self._adc_os_mode[ch] = mode
+        self._adc_os_n[ch] = n
+        if mode == ADC_OS_DECIMATE:
+            self._adc_os_shift[ch] = 1 if n == 4 else 2
+        else:
+            self._adc_os_shift[ch] = 0
+        self.__adc_update_k()
+
+    def setADCMode(self, mode):
+        """
+        Select the ADS7828 power-down / reference mode for later reads:
+          - ADC_PD_ALL_OFF: everything powered down between conversions
+          - ADC_PD_REF_OFF: converter on, internal reference off (default)
+          - ADC_PD_ADC_OFF: internal reference on, converter off
+          - ADC_PD_ALL_ON:  reference and converter on (fastest reads)
+        With the internal reference on, full scale is 2.5 V instead of the
+        board supply; use those modes only if the board has no external
+        reference on REF.
+        """
+        if not 0 <= mode <= 3:
+            raise ValueError("mode must be ADC_PD_ALL_OFF..ADC_PD_ALL_ON")
+        self._adc_buf = _ADC_BUFS[mode]
+        self._adc_vref = ADC_VREF_INTERNAL_MV if mode >= ADC_PD_ADC_OFF else ADC_VREF_MV
+        self.__adc_update_k()
+        self._adc_sel = -1
+
+    def setADCStream(self, ch=-1):
+        """
+        Opt-in fast repeat reads for one channel (0..7 or ADC_DIFFxx); -1
+        turns it off.
+        While enabled, back-to-back reads of ch skip the command byte and
+        issue only the I2C read (one transaction instead of two). Reading
+        another channel in between simply re-selects ch on the next read.
+        """
+        ch = int(ch)
+        if not -1 <= ch <= 15:
+            raise ValueError("ch must be 0..15 or -1")
+        self._adc_stream = ch
 
     def ReadADC(self, ch_or_cmd):
         """
@@ -204,19 +717,600 @@ class iBIT:
         Else:
           - return -1
         """
-        cmd_table = [ADC0, ADC1, ADC2, ADC3, ADC4, ADC5, ADC6, ADC7]
         x = int(ch_or_cmd)
 
         if 0 <= x <= 7:
-            cmd = cmd_table[x]
-        elif x in cmd_table:
-            cmd = x
-        else:
+            return self.__adc_read(x)
+        if x in _ADC_CMD:
+            return self.__adc_read(_ADC_CMD.index(x))
+        return -1
+
+    def ReadADCDiff(self, pair):
+        """
+        Read a differential pair in one conversion: ADC_DIFF01 (ADC0 - ADC1),
+        ADC_DIFF23, ADC_DIFF45, ADC_DIFF67 or the reversed ADC_DIFF10,
+        ADC_DIFF32, ADC_DIFF54, ADC_DIFF76 (0..7 selects the same pairs).
+        Returns 0..4095 (0 when IN- is above IN+), or -1 for an invalid pair.
+        """
+        x = int(pair)
+        if not 0 <= x <= 15:
             return -1
+        return self.__adc_read(x | 8)
+
+    def ReadADCChannels(self, channels, out):
+        """
+        Read several ADC channels in one call.
+          - channels: iterable of channel numbers 0..7 and/or ADC_DIFFxx
+            pairs (e.g. bytes((0, 3, ADC_DIFF45)))
+          - out: preallocated buffer, e.g. array('H', [0] * len(channels))
+        Results are written to out in the order of channels; no list or
+        command buffer is built per call. Returns out.
+        """
+        i = 0
+        for ch in channels:
+            out[i] = self.__adc_read(ch)
+            i += 1
+        return out
+
+    def ReadADCAll(self, out=None):
+        """
+        Read ADC0..ADC7 into out (array('H', [0] * 8) or similar).
+        If out is omitted, an internal buffer owned by this instance is
+        reused and returned (its contents change on the next call).
+        """
+        if out is None:
+            out = self._adc_all
+        return self.ReadADCChannels(_ADC_ALL, out)
+
+    def adc_stream(self, channels, period_ms):
+        """
+        Generator that scans channels every period_ms and yields the same
+        array('H') each time (copy it if you need to keep a frame).
+        Timing follows deadlines, so time spent in the consumer does not
+        add drift; after falling more than a period behind, the schedule
+        restarts from now instead of bursting to catch up.
+
+            for frame in ibit.adc_stream((0, 1), 5):
+                ...
+        """
+        ch = bytes(channels)
+        frame = array('H', [0] * len(ch))
+        period_ms = int(period_ms)
+        due = ticks_ms()
+        while True:
+            wait = ticks_diff(due, ticks_ms())
+            if wait > 0:
+                sleep(wait)
+            self.ReadADCChannels(ch, frame)
+            yield frame
+            due = ticks_add(due, period_ms)
+            if ticks_diff(ticks_ms(), due) >= period_ms:
+                due = ticks_ms()
+
+    # ---------------------------
+    # Public API (ADC running statistics)
+    # ---------------------------
+    # Welford's algorithm in integers: the mean is kept in 1/256 counts and
+    # M2 in 1/256 counts^2, split into a low word below 2^24 and a high word
+    # of carries so both stay small ints. Updated from every successful read
+    # of an enabled channel (ReadADC, scans, sampler). Floats appear only in
+    # ADCStats().
+
+    def setADCStats(self, channels=_ADC_ALL):
+        """
+        Keep running statistics for channels (0..7 / ADC_DIFFxx), starting
+        from zero. setADCStats(()) turns statistics off.
+        """
+        mask = 0
+        for ch in channels:
+            mask |= 1 << ch
+        if mask and self._st_mask == 0:
+            self._st_n = array('l', [0] * 16)
+            self._st_min = array('H', [0] * 16)
+            self._st_max = array('H', [0] * 16)
+            self._st_mean = array('l', [0] * 16)
+            self._st_m2 = array('l', [0] * 16)     # M2 low 24 bits
+            self._st_m2_hi = array('l', [0] * 16)  # M2 >> 24
+        self._st_mask = mask
+        if mask:
+            self.resetADCStats()
+
+    def resetADCStats(self, ch=-1):
+        """Clear the statistics of channel ch, or of all channels (-1)."""
+        if not self._st_mask:
+            return
+        for i in (range(16) if ch == -1 else (ch,)):
+            self._st_n[i] = 0
+            self._st_mean[i] = 0
+            self._st_m2[i] = 0
+            self._st_m2_hi[i] = 0
+
+    def __stats_add(self, idx, v):
+        n = self._st_n[idx] + 1
+        self._st_n[idx] = n
+        if n == 1:
+            self._st_min[idx] = v
+            self._st_max[idx] = v
+        elif v < self._st_min[idx]:
+            self._st_min[idx] = v
+        elif v > self._st_max[idx]:
+            self._st_max[idx] = v
+        x = v << 8
+        mean = self._st_mean[idx]
+        delta = x - mean
+        mean += (delta + (n >> 1)) // n
+        self._st_mean[idx] = mean
+        m2 = self._st_m2[idx] + ((delta * (x - mean)) >> 8)
+        if m2 >= 0x1000000:
+            self._st_m2_hi[idx] += m2 >> 24
+            m2 &= 0xFFFFFF
+        self._st_m2[idx] = m2
+
+    def ADCStats(self, ch):
+        """
+        Return (count, min, max, mean, variance) for channel ch; mean and
+        sample variance are floats (variance 0 below two samples).
+        Returns None if statistics are not enabled for ch.
+        """
+        if not self._st_mask & (1 << ch):
+            return None
+        n = self._st_n[ch]
+        if n == 0:
+            return (0, 0, 0, 0.0, 0.0)
+        m2 = self._st_m2_hi[ch] * 65536.0 + self._st_m2[ch] / 256
+        var = m2 / (n - 1) if n > 1 else 0.0
+        return (n, self._st_min[ch], self._st_max[ch], self._st_mean[ch] / 256, var)
+
+    # ---------------------------
+    # Public API (ADC calibration / millivolts)
+    # ---------------------------
+    # mV = ((raw - offset) * k) >> 16, where k folds gain, reference voltage
+    # and full-scale count (12..14 bit) into one integer computed at setup,
+    # so conversions never create float objects.
+
+    def __adc_update_k(self):
+        vref = self._adc_vref
+        for i in range(16):
+            fs = 4095 << self._adc_os_shift[i]
+            self._adc_k[i] = (self._adc_gain[i] * vref + (fs >> 1)) // fs
+
+    def setADCCalibration(self, ch, offset=0, gain=1.0):
+        """
+        Set calibration for channel ch (0..7 or ADC_DIFFxx):
+          mV = (raw - offset) * gain * Vref / full scale
+        offset is in raw counts; gain may be a float (converted once here).
+        """
+        if not 0 <= ch <= 15:
+            raise ValueError("ch must be 0..15")
+        self._adc_off[ch] = int(offset)
+        self._adc_gain[ch] = int(gain * 65536 + 0.5)
+        self.__adc_update_k()
+
+    def ReadADC_mV(self, ch):
+        """Read channel ch (0..7 or ADC_DIFFxx) and return calibrated millivolts."""
+        if not 0 <= ch <= 15:
+            raise ValueError("ch must be 0..15")
+        return ((self.__adc_read(ch) - self._adc_off[ch]) * self._adc_k[ch] + 32768) >> 16
+
+    def ReadADCChannels_mV(self, channels, out):
+        """
+        Batched scan like ReadADCChannels, writing calibrated millivolts
+        into out (e.g. array('h', [0] * n)). Returns out.
+        """
+        off = self._adc_off
+        k = self._adc_k
+        i = 0
+        for ch in channels:
+            out[i] = ((self.__adc_read(ch) - off[ch]) * k[ch] + 32768) >> 16
+            i += 1
+        return out
+
+    def ReadADCAll_mV(self, out):
+        """Read ADC0..ADC7 as calibrated millivolts into out (8 entries)."""
+        return self.ReadADCChannels_mV(_ADC_ALL, out)
+
+    # ---------------------------
+    # Public API (ADC lookup-table linearization)
+    # ---------------------------
+
+    def setADCTable(self, ch, raw_points, values=None):
+        """
+        Attach a calibration curve to channel ch (0..7 / ADC_DIFFxx):
+        raw_points are strictly ascending raw readings and values the
+        matching engineering units (-32768..32767), e.g. an IR distance
+        curve in mm. Pass raw_points=None to remove the table.
+        """
+        if not 0 <= ch <= 15:
+            raise ValueError("ch must be 0..15")
+        if self._lut is None:
+            self._lut = [None] * 16
+        if raw_points is None:
+            self._lut[ch] = None
+            return
+        xs = array('H', raw_points)
+        ys = array('h', values)
+        if len(xs) < 2 or len(xs) != len(ys):
+            raise ValueError("need 2+ points and equal lengths")
+        for i in range(1, len(xs)):
+            if xs[i] <= xs[i - 1]:
+                raise ValueError("raw_points must be strictly ascending")
+        self._lut[ch] = (xs, ys)
+
+    def ADCToUnits(self, ch, raw):
+        """
+        Convert a raw reading of channel ch with its table: binary search
+        for the segment, then integer linear interpolation. Readings
+        outside the table are clamped to the first / last value.
+        """
+        xs, ys = self._lut[ch]
+        lo = 0
+        hi = len(xs) - 1
+        if raw <= xs[0]:
+            return ys[0]
+        if raw >= xs[hi]:
+            return ys[hi]
+        while hi - lo > 1:
+            mid = (lo + hi) >> 1
+            if raw < xs[mid]:
+                hi = mid
+            else:
+                lo = mid
+        x0 = xs[lo]
+        y0 = ys[lo]
+        return y0 + (ys[hi] - y0) * (raw - x0) // (xs[hi] - x0)
+
+    def ReadADCUnits(self, ch):
+        """Read channel ch and convert it with its table (see setADCTable)."""
+        return self.ADCToUnits(ch, self.__adc_read(ch))
+
+    # ---------------------------
+    # Public API (ADC thresholds)
+    # ---------------------------
+    # Each registered channel is "above" once it reads >= level and goes back
+    # "below" only when it reads < level - hysteresis. poll() scans just the
+    # registered channels in one batch and reports crossings as a bit mask
+    # (bit ch = channel ch), calling the channel's callback if one was given.
+
+    def setADCThreshold(self, ch, level, hysteresis=0, callback=None):
+        """
+        Register (or replace) the threshold for channel ch (0..7 or
+        ADC_DIFFxx). callback(ch, above, value) is called on each crossing.
+        The first poll() only records the starting state.
+        """
+        if not 0 <= ch <= 15:
+            raise ValueError("ch must be 0..15")
+        entries = [(c, self._thr_hi[i], self._thr_lo[i], self._thr_cb[i])
+                   for i, c in enumerate(self._thr_ch) if c != ch]
+        entries.append((ch, int(level), int(level) - int(hysteresis), callback))
+        self.__thr_compile(entries)
+        self._thr_state &= ~(1 << ch)
+        self._thr_new |= 1 << ch
+
+    def clearADCThreshold(self, ch=-1):
+        """Remove the threshold of channel ch, or all of them (ch = -1)."""
+        entries = [(c, self._thr_hi[i], self._thr_lo[i], self._thr_cb[i])
+                   for i, c in enumerate(self._thr_ch) if ch != -1 and c != ch]
+        self.__thr_compile(entries)
+        mask = 0xFFFF if ch == -1 else 1 << ch
+        self._thr_state &= ~mask
+        self._thr_new &= ~mask
+
+    def __thr_compile(self, entries):
+        n = len(entries)
+        self._thr_ch = bytes(e[0] for e in entries)
+        self._thr_hi = array('h', [e[1] for e in entries])
+        self._thr_lo = array('h', [e[2] for e in entries])
+        self._thr_cb = [e[3] for e in entries]
+        self._thr_val = array('H', [0] * n)
+
+    def poll(self):
+        """
+        Scan the registered channels and return a bit mask of the channels
+        that crossed their threshold since the previous poll().
+        """
+        chans = self._thr_ch
+        if not chans:
+            return 0
+        vals = self.ReadADCChannels(chans, self._thr_val)
+        hi = self._thr_hi
+        lo = self._thr_lo
+        state = self._thr_state
+        crossed = 0
+        for i in range(len(chans)):
+            bit = 1 << chans[i]
+            v = vals[i]
+            if state & bit:
+                if v < lo[i]:
+                    state &= ~bit
+                    crossed |= bit
+            elif v >= hi[i]:
+                state |= bit
+                crossed |= bit
+        self._thr_state = state
+        crossed &= ~self._thr_new
+        self._thr_new = 0
+        if crossed:
+            for i in range(len(chans)):
+                cb = self._thr_cb[i]
+                if cb is not None and crossed & (1 << chans[i]):
+                    cb(chans[i], bool(state & (1 << chans[i])), vals[i])
+        return crossed
+
+    def thresholdState(self):
+        """Bit mask of registered channels currently above their level."""
+        return self._thr_state
+
+    # ---------------------------
+    # Public API (line sensor array)
+    # ---------------------------
+    # N channels are scanned in one batch and normalized to 0..1000 against
+    # the min/max learned by CalibrateLine() (1000 = fully over the line).
+    # ReadLine() returns the weighted centroid 0..(N-1)*1000, integer only.
+
+    def setLineSensors(self, channels, line_high=False):
+        """
+        Configure the line sensors, left to right (iterable of 0..7).
+        line_high: True if a sensor reads higher over the line than over
+        the background (default False: dark line reads lower).
+        Clears any previous calibration.
+        """
+        ch = bytes(channels)
+        n = len(ch)
+        self._ln_ch = ch
+        self._ln_high = bool(line_high)
+        self._ln_raw = array('H', [0] * n)
+        self._ln_min = array('H', [4095] * n)
+        self._ln_max = array('H', [0] * n)
+        self.line_values = array('H', [0] * n)  # normalized 0..1000 from ReadLine()
+        self._ln_last = -1  # last position seen, -1 until the line is found
+
+    def CalibrateLine(self):
+        """
+        Take one scan and widen each sensor's learned min/max. Call it
+        repeatedly while sweeping the sensors over line and background.
+        """
+        raw = self.ReadADCChannels(self._ln_ch, self._ln_raw)
+        lo = self._ln_min
+        hi = self._ln_max
+        for i in range(len(raw)):
+            v = raw[i]
+            if v < lo[i]:
+                lo[i] = v
+            if v > hi[i]:
+                hi[i] = v
+
+    def ReadLine(self):
+        """
+        Return the line position 0..(N-1)*1000 (0 = under the first sensor).
+        If no sensor sees the line, returns 0 or the maximum, on the side
+        where the line was last seen (the centre if it was never seen).
+        Normalized readings are left in self.line_values.
+        """
+        raw = self.ReadADCChannels(self._ln_ch, self._ln_raw)
+        lo = self._ln_min
+        hi = self._ln_max
+        vals = self.line_values
+        high = self._ln_high
+        n = len(raw)
+        total = 0
+        weighted = 0
+        seen = False
+        for i in range(n):
+            span = hi[i] - lo[i]
+            if span <= 0:
+                v = 0
+            else:
+                v = (raw[i] - lo[i]) * 1000 // span
+                if v < 0:
+                    v = 0
+                elif v > 1000:
+                    v = 1000
+                if not high:
+                    v = 1000 - v
+            vals[i] = v
+            if v > 200:
+                seen = True
+            if v > 50:  # ignore background noise
+                total += v
+                weighted += v * i * 1000
+
+        if not seen:
+            mid = (n - 1) * 500 if n else 0
+            if self._ln_last < 0:
+                return mid
+            return 0 if self._ln_last < mid else (n - 1) * 1000
+        self._ln_last = weighted // total
+        return self._ln_last
+
+    # ---------------------------
+    # Public API (binary ADC telemetry)
+    # ---------------------------
+    # Frame layout (all fields fixed for a given channel set):
+    #   0..1  sync 0xA5 0x5A
+    #   2     channel mask (bit n = ADCn present)
+    #   3     sequence number (0..255, wraps)
+    #   4..7  ticks_ms() timestamp, little-endian
+    #   8..   channel values in ascending channel order, 12 bits each,
+    #         packed big-endian two values per 3 bytes (odd last one in 2)
+    #   last  checksum: sum of bytes 2..last-1, modulo 256
+
+    def StartTelemetry(self, channels=_ADC_ALL):
+        """
+        Prepare telemetry for channels (iterable of 0..7, default all 8).
+        The frame buffer is allocated here, once.
+        """
+        mask = 0
+        for ch in channels:
+            mask |= 1 << ch
+        ch = bytes(i for i in range(8) if mask & (1 << i))
+        n = len(ch)
+        self._tlm_ch = ch
+        self._tlm_val = array('H', [0] * n)
+        self._tlm_frame = bytearray(8 + (3 * n + 1) // 2 + 1)
+        self._tlm_frame[0:2] = TELEMETRY_SYNC
+        self._tlm_frame[2] = mask
+        self._tlm_seq = 0
+
+    def SendTelemetry(self):
+        """Scan the telemetry channels and write one frame to the serial port."""
+        if self._tlm_frame is None:
+            self.StartTelemetry()
+        vals = self.ReadADCChannels(self._tlm_ch, self._tlm_val)
+        f = self._tlm_frame
+        t = ticks_ms()
+        f[3] = self._tlm_seq
+        self._tlm_seq = (self._tlm_seq + 1) & 0xFF
+        f[4] = t & 0xFF
+        f[5] = (t >> 8) & 0xFF
+        f[6] = (t >> 16) & 0xFF
+        f[7] = (t >> 24) & 0xFF
+
+        # Decimated (13/14-bit) readings are scaled back to 12 bits
+        ch = self._tlm_ch
+        shift = self._adc_os_shift
+        n = len(vals)
+        j = 8
+        i = 0
+        while i < n:
+            a = vals[i] >> shift[ch[i]]
+            f[j] = a >> 4
+            if i + 1 < n:
+                b = vals[i + 1] >> shift[ch[i + 1]]
+                f[j + 1] = ((a & 15) << 4) | (b >> 8)
+                f[j + 2] = b & 0xFF
+                j += 3
+            else:
+                f[j + 1] = (a & 15) << 4
+                j += 2
+            i += 2
+
+        c = 0
+        for k in range(2, j):
+            c += f[k]
+        f[j] = c & 0xFF
+        uart.write(f)
+
+    # ---------------------------
+    # Public API (ADC background sampler)
+    # ---------------------------
+    # The sampler reads a fixed set of channels every period_ms into a ring
+    # buffer of unread frames; once it is full, new frames are dropped until
+    # ReadSample() frees a slot. On micro:bit V2 it is driven by
+    # run_every(); on V1 (or in addition) call ServiceSampler() from the loop.
+    # A timer tick is skipped while a frame or another ADC read is in
+    # progress. The ring has one spare slot: only ServiceSampler() moves the
+    # head and only ReadSample() moves the tail, so a frame being read is
+    # never overwritten; when the ring is full new frames are dropped.
+
+    def StartSampler(self, channels, period_ms=10, size=16):
+        """
+        Start sampling channels (iterable of 0..7 / ADC_DIFFxx) every period_ms,
+        keeping up to size frames. Buffers are allocated here, once.
+        """
+        ch = bytes(channels)
+        self._smp_on = False
+        self._smp_ch = ch
+        self._smp_val = array('H', [0] * (len(ch) * (size + 1)))
+        self._smp_ts = array('l', [0] * (size + 1))
+        self._smp_slots = size + 1
+        self._smp_head = 0
+        self._smp_tail = 0
+        self._smp_period = int(period_ms)
+        self.sampler_overruns = 0
+        self.sampler_missed = 0
+
+        # run_every() callbacks cannot be removed, so register only once;
+        # the timer period is the one given on the first start. Its first
+        # call comes one period from now, so the schedule starts there.
+        if _run_every is not None:
+            self._smp_due = ticks_add(ticks_ms(), self._smp_period)
+        else:
+            self._smp_due = ticks_ms()
+        self._smp_on = True
+        if _run_every is not None and not self._smp_timer:
+            _run_every(self.__sampler_timer, ms=self._smp_period)
+            self._smp_timer = True
+
+    def StopSampler(self):
+        """Stop taking samples. Frames already buffered can still be read."""
+        self._smp_on = False
 
-        i2c.write(self.ADC_ADDRESS, bytes([cmd]), repeat=False)
-        data = i2c.read(self.ADC_ADDRESS, 2, repeat=False)
-        return (data[0] << 8) | data[1]
+    def __sampler_timer(self):
+        if self._smp_on and not self._smp_busy and not self._adc_lock:
+            try:
+                self.ServiceSampler()
+            except OSError:
+                pass  # counted in adc_errors; an exception would stop run_every
+
+    def ServiceSampler(self):
+        """
+        Take a frame if one is due. Returns 1 if a frame was taken, else 0.
+        If the caller fell behind by more than one period, the missed slots
+        are counted in sampler_missed and the schedule restarts from now.
+        While the ring is full a due slot is skipped without reading the ADC
+        and counted in sampler_overruns.
+        """
+        if not self._smp_on or self._smp_busy:
+            return 0
+        now = ticks_ms()
+        if ticks_diff(now, self._smp_due) < 0:
+            return 0
+
+        self._smp_busy = True
+        try:
+            ch = self._smp_ch
+            n = len(ch)
+            head = self._smp_head
+            nxt = head + 1
+            if nxt == self._smp_slots:
+                nxt = 0
+            taken = nxt != self._smp_tail
+            if not taken:
+                self.sampler_overruns += 1  # full: keep the unread frames
+            else:
+                base = head * n
+                vals = self._smp_val
+                for i in range(n):
+                    vals[base + i] = self.__adc_read(ch[i])
+                self._smp_ts[head] = now
+                self._smp_head = nxt  # publish only once the frame is complete
+
+            due = ticks_add(self._smp_due, self._smp_period)
+            if ticks_diff(now, due) >= 0:
+                self.sampler_missed += ticks_diff(now, due) // self._smp_period + 1
+                due = ticks_add(now, self._smp_period)
+            self._smp_due = due
+        finally:
+            self._smp_busy = False
+        return 1 if taken else 0
+
+    def SamplesAvailable(self):
+        """Number of buffered frames waiting to be read."""
+        count = self._smp_head - self._smp_tail
+        if count < 0:
+            count += self._smp_slots
+        return count
+
+    def ReadSample(self, out):
+        """
+        Copy the oldest buffered frame into out (one entry per sampled
+        channel) and return its ticks_ms() timestamp, or None if empty.
+        """
+        tail = self._smp_tail
+        if tail == self._smp_head:
+            return None
+        ch = self._smp_ch
+        n = len(ch)
+        base = tail * n
+        vals = self._smp_val
+        for i in range(n):
+            out[i] = vals[base + i]
+        t = self._smp_ts[tail]
+        tail += 1
+        if tail == self._smp_slots:
+            tail = 0
+        self._smp_tail = tail
+        return t
 
     # ---------------------------
     # Public API (Servo)
@@ -224,15 +1318,40 @@ class iBIT:
     def Servo(self, which, degree):
         # Tune us_min/us_max if needed (e.g., 1000..2000 for some servos)
         if which == SV1:
-            self.__servo_write_deg(pin8, degree, us_min=500, us_max=2500)
+            self._sv[0] = self.__servo_write_deg(pin8, degree, us_min=500, us_max=2500)
+            self._sv[1] = 1
         elif which == SV2:
-            self.__servo_write_deg(pin12, degree, us_min=500, us_max=2500)
+            self._sv[2] = self.__servo_write_deg(pin12, degree, us_min=500, us_max=2500)
+            self._sv[3] = 1
 
     def ServoStop(self, which):
         if which == SV1:
             self.__servo_stop(pin8)
+            self._sv[1] = 0
         elif which == SV2:
             self.__servo_stop(pin12)
+            self._sv[3] = 0
+
+    # ---------------------------
+    # Public API (state readback)
+    # ---------------------------
+    def state(self):
+        """
+        Return what the board is currently driving, as an iBITState.
+        The same object is refilled on every call; copy fields you keep.
+        """
+        sh = self._pin
+        sv = self._sv
+        st = self._state
+        st.m1_dir = -1 if sh[0] < 0 else (FORWARD if sh[0] else BACKWARD)
+        st.m1_duty = sh[1] if sh[1] > 0 else 0
+        st.m2_dir = -1 if sh[2] < 0 else (BACKWARD if sh[2] else FORWARD)
+        st.m2_duty = sh[3] if sh[3] > 0 else 0
+        st.sv1_deg = sv[0]
+        st.sv1_on = bool(sv[1])
+        st.sv2_deg = sv[2]
+        st.sv2_on = bool(sv[3])
+        return st
 
     # ---------------------------
     # Public API (short movement helpers)
@@ -240,57 +1359,177 @@ class iBIT:
     # These are convenience wrappers around Motor/Motor2/Turn/Spin.
     # If t_sec > 0, the robot runs for that duration (seconds).
     # Note: these functions do not auto-stop at the end; call ao() if needed.
+    # With wait=False they return at once instead: the motors keep running
+    # and tick() stops them when t_sec has elapsed, so the loop can keep
+    # reading sensors. Any later helper call replaces a pending deadline.
 
-    def fd(self, spd, t_sec=0):
+    def fd(self, spd, t_sec=0, wait=True):
         """Move forward at spd (%). Optional duration in seconds."""
         self.Motor(FORWARD, spd)
-        if t_sec > 0:
-            sleep(t_sec * 1000)
+        self.__hold(t_sec, wait)
 
-    def fd2(self, spd1, spd2, t_sec=0):
+    def fd2(self, spd1, spd2, t_sec=0, wait=True):
         """Move forward with independent left/right speeds (%). Optional duration in seconds."""
         self.Motor2(FORWARD, spd1, spd2)
-        if t_sec > 0:
-            sleep(t_sec * 1000)
+        self.__hold(t_sec, wait)
 
-    def bk(self, spd, t_sec=0):
+    def bk(self, spd, t_sec=0, wait=True):
         """Move backward at spd (%). Optional duration in seconds."""
         self.Motor(BACKWARD, spd)
-        if t_sec > 0:
-            sleep(t_sec * 1000)
+        self.__hold(t_sec, wait)
 
-    def bk2(self, spd1, spd2, t_sec=0):
+    def bk2(self, spd1, spd2, t_sec=0, wait=True):
         """Move backward with independent left/right speeds (%). Optional duration in seconds."""
         self.Motor2(BACKWARD, spd1, spd2)
-        if t_sec > 0:
-            sleep(t_sec * 1000)
+        self.__hold(t_sec, wait)
 
-    def sl(self, spd, t_sec=0):
+    def sl(self, spd, t_sec=0, wait=True):
         """Spin left (in-place rotation) at spd (%). Optional duration in seconds."""
         self.Spin(SPIN_LEFT, spd)
-        if t_sec > 0:
-            sleep(t_sec * 1000)
+        self.__hold(t_sec, wait)
 
-    def sr(self, spd, t_sec=0):
+    def sr(self, spd, t_sec=0, wait=True):
         """Spin right (in-place rotation) at spd (%). Optional duration in seconds."""
         self.Spin(SPIN_RIGHT, spd)
-        if t_sec > 0:
-            sleep(t_sec * 1000)
+        self.__hold(t_sec, wait)
 
-    def tl(self, spd, t_sec=0):
+    def tl(self, spd, t_sec=0, wait=True):
         """Turn left (arc turn) at spd (%). Optional duration in seconds."""
         self.Turn(TURN_LEFT, spd)
-        if t_sec > 0:
-            sleep(t_sec * 1000)
+        self.__hold(t_sec, wait)
 
-    def tr(self, spd, t_sec=0):
+    def tr(self, spd, t_sec=0, wait=True):
         """Turn right (arc turn) at spd (%). Optional duration in seconds."""
         self.Turn(TURN_RIGHT, spd)
-        if t_sec > 0:
-            sleep(t_sec * 1000)
+        self.__hold(t_sec, wait)
 
     def ao(self, t_sec=0):
         """All stop (stop both motors). Optional wait time in seconds."""
         self.MotorStop(M_ALL)
+        self.__hold(t_sec, True)
+
+    def __hold(self, t_sec, wait):
+        if t_sec > 0 and not wait:
+            self._mv_due = ticks_add(ticks_ms(), int(t_sec * 1000))
+            return
+        self._mv_due = None
         if t_sec > 0:
-            sleep(t_sec * 1000)
+            if not self._rp_rate:
+                sleep(t_sec * 1000)
+                return
+            due = ticks_add(ticks_ms(), int(t_sec * 1000))
+            while True:  # keep the ramp moving while blocked
+                self.__ramp_tick()
+                left = ticks_diff(due, ticks_ms())
+                if left <= 0:
+                    break
+                sleep(5 if left > 5 else left)
+
+    def tick(self):
+        """
+        Service non-blocking timed moves and the motion queue; call it often
+        from the main loop (not from a run_every() callback, which could
+        interleave with motor pin writes in the main code). Stops both
+        motors once the deadline of a wait=False helper has passed, advances
+        queued moves and steps the motor ramp (setMotorRamp). Returns True
+        while any of them is still in progress.
+        """
+        busy = False
+        if self._mv_due is not None:
+            if ticks_diff(ticks_ms(), self._mv_due) < 0:
+                busy = True
+            else:
+                self._mv_due = None
+                self.MotorStop(M_ALL)
+        if self._mq_count:
+            busy = self.__motion_tick() or busy
+        if self._rp_rate:
+            busy = self.__ramp_tick() or busy
+        return busy
+
+    # ---------------------------
+    # Public API (motion queue)
+    # ---------------------------
+    # Queued moves run one after another from tick(). Each record is packed
+    # as 4 ints (op, start speed, end speed, duration ms) in one preallocated
+    # array; a record whose speeds differ ramps linearly over its duration.
+    # Record deadlines are chained, so a late tick() does not stretch the
+    # routine; moves whose time has fully passed are skipped.
+
+    def setMotionQueue(self, slots=16):
+        """Allocate the motion queue for up to slots moves (clears it)."""
+        self._mq = array('l', [0] * (4 * slots))
+        self._mq_slots = slots
+        self._mq_head = 0
+        self._mq_count = 0
+
+    def addMotion(self, op, spd=0, t_sec=0, end_spd=None):
+        """
+        Queue a move: op is MOVE_FD, MOVE_BK, MOVE_SL, MOVE_SR, MOVE_TL,
+        MOVE_TR or MOVE_STOP; spd in %, held for t_sec seconds, or ramped
+        to end_spd. Starts at once if the queue was empty.
+        Returns False (and queues nothing) when the queue is full.
+        """
+        self._mv_due = None
+        if self._mq is None:
+            self.setMotionQueue()
+        if self._mq_count == self._mq_slots:
+            return False
+        q = self._mq
+        i = ((self._mq_head + self._mq_count) % self._mq_slots) * 4
+        q[i] = op
+        q[i + 1] = int(spd)
+        q[i + 2] = int(spd) if end_spd is None else int(end_spd)
+        q[i + 3] = int(t_sec * 1000)
+        self._mq_count += 1
+        if self._mq_count == 1:
+            self._mq_t0 = ticks_ms()
+            self.__motion_apply(op, q[i + 1])
+        return True
+
+    def clearMotion(self):
+        """Drop all queued moves (including the running one) and stop."""
+        if self._mq_count:
+            self._mq_count = 0
+            self.MotorStop(M_ALL)
+
+    def motionPending(self):
+        """Number of queued moves, including the one running now."""
+        return self._mq_count
+
+    def __motion_tick(self):
+        q = self._mq
+        i = self._mq_head * 4
+        elapsed = ticks_diff(ticks_ms(), self._mq_t0)
+        while elapsed >= q[i + 3]:
+            dur = q[i + 3]
+            self._mq_head = (self._mq_head + 1) % self._mq_slots
+            self._mq_count -= 1
+            if not self._mq_count:
+                self.MotorStop(M_ALL)
+                return False
+            self._mq_t0 = ticks_add(self._mq_t0, dur)
+            elapsed -= dur
+            i = self._mq_head * 4
+        a = q[i + 1]
+        b = q[i + 2]
+        if a != b:
+            a += (b - a) * elapsed // q[i + 3]
+        self.__motion_apply(q[i], a)
+        return True
+
+    def __motion_apply(self, op, spd):
+        if op == MOVE_FD:
+            self.Motor(FORWARD, spd)
+        elif op == MOVE_BK:
+            self.Motor(BACKWARD, spd)
+        elif op == MOVE_SL:
+            self.Spin(SPIN_LEFT, spd)
+        elif op == MOVE_SR:
+            self.Spin(SPIN_RIGHT, spd)
+        elif op == MOVE_TL:
+            self.Turn(TURN_LEFT, spd)
+        elif op == MOVE_TR:
+            self.Turn(TURN_RIGHT, spd)
+        else:
+            self.MotorStop(M_ALL)
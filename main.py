@@ -12,6 +12,7 @@
 
 from microbit import *
 from iBIT import *  # Requires your iBIT.py library in the project
+from array import array
 
 # iBIT MicroPython port (instance-based I2C address selection)
 # - ibit = iBIT()        -> default address = IBIT_V2 (0x4A)
@@ -23,6 +24,7 @@ direction_motor = 0          # 0 = FORWARD, 1 = BACKWARD
 direction_time = 0           # Counts time slots to change behavior
 spd = 60                     # Motor speed (0..100)
 t0 = 0                       # Time reference for 500 ms periodic update
+adc_values = array('H', [0] * 8)  # Reused by ibit.ReadADCAll() on every update
 
 
 def showA():
@@ -87,7 +89,7 @@ while True:
 
             print("ADC0-7 Read Test")
             adc_labels = ["ADC{}".format(i) for i in range(8)]
-            adc_values = [ibit.ReadADC(i) for i in range(8)]  # Uses channel style: 0..7
+            ibit.ReadADCAll(adc_values)  # Batched scan of channels 0..7
             print("[" + ", ".join(adc_labels) + "]")
             print("[" + ", ".join("{:4d}".format(v) for v in adc_values) + "]")
             print()